@@ -0,0 +1,19 @@
+from django.db.models import Value
+from django.db.models.functions import Lower
+from django_filters import rest_framework as filters
+
+from fuser.models import User
+
+
+class UserFilter(filters.FilterSet):
+    """Username and email are matched case-insensitively using lower() indexes"""
+
+    username = filters.CharFilter(method="filter_lower")
+    email = filters.CharFilter(method="filter_lower")
+
+    class Meta:
+        model = User
+        fields = ["username", "email", "is_verified"]
+
+    def filter_lower(self, queryset, name, value):
+        return queryset.filter(**{f"{name}__lower": Lower(Value(value))})
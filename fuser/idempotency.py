@@ -0,0 +1,65 @@
+import hashlib
+import json
+from datetime import timedelta
+from functools import wraps
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.exceptions import APIException, ValidationError
+from rest_framework.response import Response
+
+from fuser.models import IdempotencyKey
+
+HEADER = "Idempotency-Key"
+MAX_LENGTH = IdempotencyKey._meta.get_field("key").max_length
+
+
+class IdempotencyKeyReused(APIException):
+    status_code = status.HTTP_422_UNPROCESSABLE_ENTITY
+    default_detail = f"{HEADER} was already used with different request data"
+
+
+def request_hash(request):
+    data = json.dumps(request.data, sort_keys=True, default=str)
+    return hashlib.sha256(data.encode()).hexdigest()
+
+
+def idempotent(method):
+    """
+    Replay stored response for repeated requests with the same Idempotency-Key header.
+
+    Key is inserted in the same transaction the view runs in, so concurrent duplicate blocks
+    on the unique index until the first request commits and then receives its response.
+    Stored response is replayed only for the same request data, keys older than IDEMPOTENCY_KEY_TTL
+    are treated as missing. Failed requests roll the key back and may be retried.
+    """
+    @wraps(method)
+    def wrapper(self, request, *args, **kwargs):
+        key = request.headers.get(HEADER)
+        if not key:
+            return method(self, request, *args, **kwargs)
+        if len(key) > MAX_LENGTH:
+            raise ValidationError({"detail": f"{HEADER} header is too long"})
+        scope = f"{request.user.pk or 0}:{request.path}"
+        data_hash = request_hash(request)
+        now = timezone.now()
+        with transaction.atomic():
+            record, created = IdempotencyKey.objects.select_for_update().get_or_create(
+                scope=scope, key=key, defaults={"request_hash": data_hash},
+            )
+            if not created and record.created < now - timedelta(seconds=settings.IDEMPOTENCY_KEY_TTL):
+                # Expired key is reused as new one, row is locked until this request finishes
+                record.created = now
+                record.request_hash = data_hash
+            elif not created:
+                if record.request_hash != data_hash:
+                    raise IdempotencyKeyReused()
+                return Response(record.response, status=record.status_code)
+            response = method(self, request, *args, **kwargs)
+            record.status_code = response.status_code
+            record.response = response.data
+            record.save(update_fields=["created", "request_hash", "status_code", "response"])
+        return response
+    return wrapper
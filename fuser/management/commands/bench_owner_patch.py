@@ -0,0 +1,64 @@
+import base64
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test.utils import CaptureQueriesContext, setup_test_environment, teardown_test_environment
+from rest_framework.test import APIClient
+
+from fuser.models import User
+
+
+class Command(BaseCommand):
+    help = (
+        "Measure owner PATCH /user/{id} latency and query count on a temporary test database. "
+        "By default authentication is forced and user lookup and password hashing are not measured, "
+        "use --basic-auth to include them."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--users", type=int, default=1000, help="Number of users created before measuring")
+        parser.add_argument("--requests", type=int, default=3000, help="Number of measured requests")
+        parser.add_argument(
+            "--basic-auth", action="store_true", help="Authenticate every request with HTTP Basic credentials",
+        )
+
+    def handle(self, *args, **options):
+        setup_test_environment(debug=False)
+        old_name = connection.settings_dict["NAME"]
+        connection.creation.create_test_db(verbosity=0)
+        try:
+            self.bench(options["users"], options["requests"], options["basic_auth"])
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+            teardown_test_environment()
+
+    def bench(self, users_count, requests_count, basic_auth):
+        User.objects.bulk_create(User(username=f"user{i}") for i in range(users_count))
+        user = User.objects.order_by("pk")[users_count // 2]
+        client = APIClient()
+        if basic_auth:
+            user.set_password("password")
+            user.save(update_fields=["password"])
+            credentials = base64.b64encode(f"{user.username}:password".encode()).decode()
+            client.credentials(HTTP_AUTHORIZATION=f"Basic {credentials}")
+        else:
+            client.force_authenticate(user)
+        url = f"/user/{user.id}"
+
+        # Warm up
+        for i in range(min(requests_count, 200)):
+            client.patch(url, {"city": f"city{i % 10}"}, format="json")
+
+        with CaptureQueriesContext(connection) as queries:
+            client.patch(url, {"city": "city"}, format="json")
+        # Captured queries are read lazily from connection log, which is reset by later requests
+        queries_count = len(queries.captured_queries)
+
+        start = time.perf_counter()
+        for i in range(requests_count):
+            client.patch(url, {"city": f"city{i % 10}"}, format="json")
+        elapsed = time.perf_counter() - start
+
+        self.stdout.write(f"Queries per request: {queries_count}")
+        self.stdout.write(f"Owner PATCH: {elapsed / requests_count * 1e6:.0f} us/request")
@@ -0,0 +1,35 @@
+from itertools import groupby
+
+from django.core.management.base import BaseCommand
+from django.db.models import Count
+from django.db.models.functions import Lower
+
+from fuser.models import User
+
+
+class Command(BaseCommand):
+    help = "Find usernames differing only by case, these must be resolved before adding case-insensitive constraint"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=2000, help="Number of rows fetched from cursor at once")
+
+    def handle(self, *args, **options):
+        colliding = (
+            User.all_objects.annotate(lower=Lower("username"))
+            .values("lower")
+            .annotate(count=Count("pk"))
+            .filter(count__gt=1)
+            .values("lower")
+        )
+        # Single ordered pass, no lower(username) index is expected to exist yet
+        users = (
+            User.all_objects.annotate(lower=Lower("username"))
+            .filter(lower__in=colliding)
+            .order_by("lower", "pk")
+            .values_list("lower", "pk", "username")
+        )
+        total = 0
+        for _, group in groupby(users.iterator(chunk_size=options["batch_size"]), key=lambda row: row[0]):
+            self.stdout.write(", ".join(f"{pk}:{username}" for _, pk, username in group))
+            total += 1
+        self.stdout.write(f"Found {total} collisions")
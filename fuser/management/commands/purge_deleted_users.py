@@ -0,0 +1,32 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from fuser.models import User
+
+
+class Command(BaseCommand):
+    help = "Remove soft deleted users from database in batches"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=500, help="Number of users removed per transaction")
+        parser.add_argument("--pause", type=float, default=0.5, help="Seconds to sleep between batches")
+
+    def handle(self, *args, **options):
+        batch_size = options["batch_size"]
+        pause = options["pause"]
+        total = 0
+        while True:
+            ids = list(
+                User.all_objects.filter(deleted__isnull=False).order_by("pk").values_list("pk", flat=True)[:batch_size]
+            )
+            if not ids:
+                break
+            with transaction.atomic():
+                User.all_objects.filter(pk__in=ids).delete()
+            total += len(ids)
+            if len(ids) < batch_size:
+                break
+            time.sleep(pause)
+        self.stdout.write(f"Purged {total} users")
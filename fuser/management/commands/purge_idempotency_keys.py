@@ -0,0 +1,32 @@
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from fuser.models import IdempotencyKey
+
+
+class Command(BaseCommand):
+    help = "Remove stored idempotency keys older than IDEMPOTENCY_KEY_TTL in batches"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=5000, help="Number of keys removed per query")
+        parser.add_argument("--pause", type=float, default=0.1, help="Seconds to sleep between batches")
+
+    def handle(self, *args, **options):
+        batch_size = options["batch_size"]
+        pause = options["pause"]
+        expired = timezone.now() - timedelta(seconds=settings.IDEMPOTENCY_KEY_TTL)
+        total = 0
+        while True:
+            ids = list(IdempotencyKey.objects.filter(created__lt=expired).values_list("pk", flat=True)[:batch_size])
+            if not ids:
+                break
+            IdempotencyKey.objects.filter(pk__in=ids).delete()
+            total += len(ids)
+            if len(ids) < batch_size:
+                break
+            time.sleep(pause)
+        self.stdout.write(f"Purged {total} idempotency keys")
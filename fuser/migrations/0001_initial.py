@@ -0,0 +1,42 @@
+# Generated by Django 5.1.15 on 2026-10-19 19:34
+
+import django.contrib.auth.models
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='User',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('password', models.CharField(max_length=128, verbose_name='password')),
+                ('last_login', models.DateTimeField(blank=True, null=True, verbose_name='last login')),
+                ('is_staff', models.BooleanField(default=False, verbose_name='Staff status')),
+                ('is_superuser', models.BooleanField(default=False, verbose_name='Super user status')),
+                ('is_active', models.BooleanField(default=True, verbose_name='Active')),
+                ('created', models.DateTimeField(auto_now_add=True)),
+                ('updated', models.DateTimeField(auto_now=True)),
+                ('username', models.CharField(max_length=50, unique=True, verbose_name='Username')),
+                ('email', models.EmailField(blank=True, max_length=254, verbose_name='E-mail')),
+                ('first_name', models.CharField(blank=True, max_length=50, verbose_name='First name')),
+                ('last_name', models.CharField(blank=True, max_length=50, verbose_name='Last name')),
+                ('city', models.CharField(blank=True, max_length=50, verbose_name='City')),
+                ('country', models.CharField(blank=True, max_length=50, verbose_name='Country')),
+                ('balance', models.IntegerField(default=0, verbose_name='Balance')),
+                ('is_verified', models.BooleanField(default=False, verbose_name='staff status')),
+            ],
+            options={
+                'abstract': False,
+            },
+            managers=[
+                ('objects', django.contrib.auth.models.UserManager()),
+            ],
+        ),
+    ]
@@ -0,0 +1,38 @@
+# Generated by Django 5.1.15 on 2026-10-19 19:34
+
+import django.contrib.auth.models
+import fuser.models
+from django.contrib.postgres.operations import AddIndexConcurrently
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    # Index is built concurrently to not block writes to user table
+    atomic = False
+
+    dependencies = [
+        ('fuser', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AlterModelOptions(
+            name='user',
+            options={'default_manager_name': 'all_objects'},
+        ),
+        migrations.AlterModelManagers(
+            name='user',
+            managers=[
+                ('objects', fuser.models.ActiveUserManager()),
+                ('all_objects', django.contrib.auth.models.UserManager()),
+            ],
+        ),
+        migrations.AddField(
+            model_name='user',
+            name='deleted',
+            field=models.DateTimeField(blank=True, null=True, verbose_name='Deleted'),
+        ),
+        AddIndexConcurrently(
+            model_name='user',
+            index=models.Index(condition=models.Q(('deleted__isnull', False)), fields=['id'], name='user_deleted_idx'),
+        ),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 5.1.15 on 2026-10-19 19:35
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('fuser', '0002_user_deleted'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='IdempotencyKey',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('key', models.CharField(max_length=255, verbose_name='Key')),
+                ('scope', models.CharField(max_length=255, verbose_name='Scope')),
+                ('request_hash', models.CharField(max_length=64, verbose_name='Request data hash')),
+                ('created', models.DateTimeField(auto_now_add=True, db_index=True)),
+                ('status_code', models.PositiveSmallIntegerField(null=True, verbose_name='Response status')),
+                ('response', models.JSONField(null=True, verbose_name='Response data')),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name='idempotencykey',
+            constraint=models.UniqueConstraint(fields=('scope', 'key'), name='idempotency_key_unique'),
+        ),
+    ]
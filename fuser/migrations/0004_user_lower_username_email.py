@@ -0,0 +1,44 @@
+# Generated by Django 5.1.15 on 2026-10-19 19:36
+
+import django.db.models.functions.text
+import fuser.models
+from django.contrib.postgres.operations import AddIndexConcurrently
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    # Indexes are built concurrently to not block writes to user table,
+    # run find_username_collisions command first, unique index build fails on collisions
+    atomic = False
+
+    dependencies = [
+        ('fuser', '0003_idempotencykey'),
+    ]
+
+    operations = [
+        migrations.AlterModelManagers(
+            name='user',
+            managers=[
+                ('objects', fuser.models.ActiveUserManager()),
+                ('all_objects', fuser.models.CaseInsensitiveUserManager()),
+            ],
+        ),
+        AddIndexConcurrently(
+            model_name='user',
+            index=models.Index(django.db.models.functions.text.Lower('email'), name='user_email_lower_idx'),
+        ),
+        migrations.SeparateDatabaseAndState(
+            database_operations=[
+                migrations.RunSQL(
+                    sql='CREATE UNIQUE INDEX CONCURRENTLY "user_username_lower_unique" ON "fuser_user" (LOWER("username"));',
+                    reverse_sql='DROP INDEX CONCURRENTLY IF EXISTS "user_username_lower_unique";',
+                ),
+            ],
+            state_operations=[
+                migrations.AddConstraint(
+                    model_name='user',
+                    constraint=models.UniqueConstraint(django.db.models.functions.text.Lower('username'), name='user_username_lower_unique', violation_error_message='user with this Username already exists.'),
+                ),
+            ],
+        ),
+    ]
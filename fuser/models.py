@@ -1,6 +1,18 @@
 from django.contrib.auth.base_user import AbstractBaseUser
 from django.contrib.auth.models import UserManager
 from django.db import models
+from django.db.models.functions import Lower
+from django.utils import timezone
+
+
+class CaseInsensitiveUserManager(UserManager):
+    def get_by_natural_key(self, username):
+        return self.get(username__lower=Lower(models.Value(username)))
+
+
+class ActiveUserManager(CaseInsensitiveUserManager):
+    def get_queryset(self):
+        return super().get_queryset().filter(deleted__isnull=True)
 
 
 class User(AbstractBaseUser):
@@ -9,6 +21,7 @@ class User(AbstractBaseUser):
     is_active = models.BooleanField("Active", default=True)
     created = models.DateTimeField(auto_now_add=True)
     updated = models.DateTimeField(auto_now=True)
+    deleted = models.DateTimeField("Deleted", null=True, blank=True)
 
     username = models.CharField("Username", max_length=50, unique=True)
     email = models.EmailField("E-mail", blank=True)
@@ -22,4 +35,47 @@ class User(AbstractBaseUser):
     EMAIL_FIELD = "email"
     USERNAME_FIELD = "username"
 
-    objects = UserManager()
\ No newline at end of file
+    objects = ActiveUserManager()
+    all_objects = CaseInsensitiveUserManager()
+
+    class Meta:
+        # Unfiltered manager stays default so auth and uniqueness checks still see deleted accounts
+        default_manager_name = "all_objects"
+        indexes = [
+            # Partial index covers only deleted rows waiting for purge
+            models.Index(fields=["id"], condition=models.Q(deleted__isnull=False), name="user_deleted_idx"),
+            models.Index(Lower("email"), name="user_email_lower_idx"),
+        ]
+        constraints = [
+            models.UniqueConstraint(
+                Lower("username"),
+                name="user_username_lower_unique",
+                violation_error_message="user with this Username already exists.",
+            ),
+        ]
+
+    def soft_delete(self):
+        """Hide account from querysets, actual row removal is done by purge_deleted_users command"""
+        self.deleted = timezone.now()
+        self.is_active = False
+        self.updated = self.deleted
+        User.all_objects.filter(pk=self.pk).update(deleted=self.deleted, is_active=False, updated=self.updated)
+
+
+# Enables username__lower and email__lower lookups matching functional indexes above
+User._meta.get_field("username").register_lookup(Lower)
+User._meta.get_field("email").register_lookup(Lower)
+
+
+class IdempotencyKey(models.Model):
+    key = models.CharField("Key", max_length=255)
+    scope = models.CharField("Scope", max_length=255)
+    request_hash = models.CharField("Request data hash", max_length=64)
+    created = models.DateTimeField(auto_now_add=True, db_index=True)
+    status_code = models.PositiveSmallIntegerField("Response status", null=True)
+    response = models.JSONField("Response data", null=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["scope", "key"], name="idempotency_key_unique"),
+        ]
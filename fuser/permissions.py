@@ -2,5 +2,10 @@ from rest_framework import permissions
 
 
 class IsOwner(permissions.BasePermission):
+    """Decides from URL pk and authenticated user id, so no object has to be loaded"""
+
+    def has_permission(self, request, view):
+        return request.user.pk is not None and view.kwargs.get("pk") == request.user.pk
+
     def has_object_permission(self, request, view, obj):
-        return obj == request.user
\ No newline at end of file
+        return obj.pk == request.user.pk
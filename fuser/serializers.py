@@ -1,3 +1,5 @@
+from django.db.models import Value
+from django.db.models.functions import Lower
 from rest_framework import serializers
 
 from fuser import models
@@ -15,6 +17,13 @@ class UserCreateSerializer(serializers.ModelSerializer):
             "city",
             "country",
         ]
+        # Exact match validator is replaced by case-insensitive check below
+        extra_kwargs = {"username": {"validators": []}}
+
+    def validate_username(self, value):
+        if models.User.all_objects.filter(username__lower=Lower(Value(value))).exists():
+            raise serializers.ValidationError("user with this Username already exists.")
+        return value
 
 
 class UserListItemSerializer(serializers.ModelSerializer):
@@ -48,6 +57,12 @@ class UserUpdateSerializer(serializers.ModelSerializer):
 
         read_only_fields = ['id', 'username']
 
+    def update(self, instance, validated_data):
+        for field, value in validated_data.items():
+            setattr(instance, field, value)
+        instance.save(update_fields=[*validated_data, "updated"])
+        return instance
+
 
 class UserUpdateVerificationSerializer(serializers.Serializer):
     value = serializers.BooleanField()
@@ -29,6 +29,9 @@ ALLOWED_HOSTS = []
 
 AUTH_USER_MODEL = "fuser.User"
 
+# Seconds to keep stored responses for Idempotency-Key header
+IDEMPOTENCY_KEY_TTL = 24 * 60 * 60
+
 # Application definition
 
 INSTALLED_APPS = [
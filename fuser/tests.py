@@ -1,9 +1,20 @@
+import base64
+import threading
+import time
 from copy import copy
-
+from datetime import timedelta
+from io import StringIO
+from unittest import skipUnless
+from unittest.mock import patch
+
+from django.core.management import call_command
+from django.db import connection
+from django.test import TransactionTestCase, override_settings
+from django.utils import timezone
 from rest_framework import status
-from rest_framework.test import APITestCase
+from rest_framework.test import APIClient, APITestCase
 
-from fuser import models
+from fuser import models, serializers
 
 
 class UserListViewTests(APITestCase):
@@ -57,6 +68,29 @@ class UserListViewTests(APITestCase):
         self.assertEqual(user.city, "")
         self.assertEqual(user.country, "")
 
+    def test_create_idempotent(self):
+        data = {
+            "username": "fuser",
+        }
+        headers = {"Idempotency-Key": "create-1"}
+        response = self.client.post(self.url, data=data, format="json", headers=headers)
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        response_json = response.json()
+        response = self.client.post(self.url, data=data, format="json", headers=headers)
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(response.json(), response_json)
+        self.assertEqual(models.User.objects.filter(username="fuser").count(), 1)
+
+    def test_create_idempotent_different_data(self):
+        headers = {"Idempotency-Key": "1"}
+        data = {"username": "alice", "email": "alice@example.com"}
+        response = self.client.post(self.url, data=data, format="json", headers=headers)
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        response = self.client.post(self.url, data={"username": "bob"}, format="json", headers=headers)
+        self.assertEqual(response.status_code, status.HTTP_422_UNPROCESSABLE_ENTITY)
+        self.assertNotIn("alice", str(response.json()))
+        self.assertFalse(models.User.objects.filter(username="bob").exists())
+
     def test_create_fail_empty_username(self):
         data = {
             "username": "",
@@ -88,6 +122,34 @@ class UserListViewTests(APITestCase):
         expected_response = {'username': ['user with this Username already exists.']}
         self.assertEqual(response_json, expected_response)
 
+    def test_create_fail_username_occupied_case_insensitive(self):
+        models.User.objects.create(username="fuser")
+        data = {
+            "username": "FUser",
+        }
+        response = self.client.post(self.url, data=data, format="json")
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        response_json = response.json()
+        expected_response = {'username': ['user with this Username already exists.']}
+        self.assertEqual(response_json, expected_response)
+
+    def test_list_case_insensitive(self):
+        models.User.objects.create_user(username="Staff", password="password", is_staff=True)
+        user = models.User.objects.create(username="Bar", email="Bar@Example.com")
+        models.User.objects.create(username="baz", email="baz@example.com")
+
+        # Login is case-insensitive too
+        credentials = base64.b64encode(b"STAFF:password").decode()
+        self.client.credentials(HTTP_AUTHORIZATION=f"Basic {credentials}")
+
+        response = self.client.get(self.url, data=dict(username="bAR"))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([item["id"] for item in response.json()], [user.id])
+
+        response = self.client.get(self.url, data=dict(email="bar@example.COM"))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([item["id"] for item in response.json()], [user.id])
+
     def test_list_base(self):
         user1 = models.User.objects.create(username="foo", is_staff=True)
         user2 = models.User.objects.create(username="bar")
@@ -227,6 +289,21 @@ class UserDetailViewTests(APITestCase):
         for field, value in self.expected_patch_response.items():
             self.assertEqual(getattr(self.user, field), value, field)
 
+    def test_patch_by_user_single_query(self):
+        self.client.force_authenticate(user=self.user)
+        with self.assertNumQueries(1):
+            response = self.client.patch(self.url, data=self.patch_data, format="json")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.json(), self.expected_patch_response)
+        self.user.refresh_from_db()
+        self.assertEqual(self.user.email, self.new_email)
+
+    def test_patch_by_wrong_user_no_queries(self):
+        self.client.force_authenticate(user=self.wrong_user)
+        with self.assertNumQueries(0):
+            response = self.client.patch(self.url, data=self.patch_data, format="json")
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
     def test_patch_by_nobody(self):
         response = self.client.patch(self.url, data=self.patch_data, format="json")
         self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
@@ -240,8 +317,14 @@ class UserDetailViewTests(APITestCase):
         self.client.force_authenticate(user=self.staff)
         response = self.client.delete(self.url, format="json")
         self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
-        with self.assertRaises(models.User.DoesNotExist):
-            self.user.refresh_from_db()
+        self.assertFalse(models.User.objects.filter(id=self.user.id).exists())
+        updated = self.user.updated
+        self.user.refresh_from_db()
+        self.assertIsNotNone(self.user.deleted)
+        self.assertGreater(self.user.updated, updated)
+        self.assertFalse(self.user.is_active)
+        response = self.client.patch(self.url, data=self.patch_data, format="json")
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
 
     def test_delete_by_user(self):
         self.client.force_authenticate(user=self.user)
@@ -320,6 +403,66 @@ class UserUpdateBalanceViewTests(APITestCase):
         self.assertEqual(response_json, {"value": expected_value})
         self.assertEqual(user.balance, expected_value)
 
+    def test_top_up_idempotent(self):
+        self.client.force_authenticate(user=self.staff)
+        user = models.User.objects.create(username="user", is_verified=True, balance=50)
+        url = f"/user/{user.id}/update-balance"
+        headers = {"Idempotency-Key": "top-up-1"}
+        for _ in range(2):
+            response = self.client.post(url, data={"value": 100}, format="json", headers=headers)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            self.assertEqual(response.json(), {"value": 150})
+        user.refresh_from_db()
+        self.assertEqual(user.balance, 150)
+
+        # Another key is applied again
+        response = self.client.post(url, data={"value": 100}, format="json", headers={"Idempotency-Key": "top-up-2"})
+        self.assertEqual(response.json(), {"value": 250})
+
+    def test_top_up_idempotent_different_value(self):
+        self.client.force_authenticate(user=self.staff)
+        user = models.User.objects.create(username="user", is_verified=True, balance=50)
+        url = f"/user/{user.id}/update-balance"
+        headers = {"Idempotency-Key": "top-up-1"}
+        response = self.client.post(url, data={"value": 100}, format="json", headers=headers)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        response = self.client.post(url, data={"value": 200}, format="json", headers=headers)
+        self.assertEqual(response.status_code, status.HTTP_422_UNPROCESSABLE_ENTITY)
+        user.refresh_from_db()
+        self.assertEqual(user.balance, 150)
+
+    @override_settings(IDEMPOTENCY_KEY_TTL=60)
+    def test_top_up_idempotent_expired_key(self):
+        self.client.force_authenticate(user=self.staff)
+        user = models.User.objects.create(username="user", is_verified=True, balance=50)
+        url = f"/user/{user.id}/update-balance"
+        headers = {"Idempotency-Key": "top-up-1"}
+        response = self.client.post(url, data={"value": 100}, format="json", headers=headers)
+        self.assertEqual(response.json(), {"value": 150})
+        models.IdempotencyKey.objects.update(created=timezone.now() - timedelta(days=30))
+        response = self.client.post(url, data={"value": 999}, format="json", headers=headers)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.json(), {"value": 1149})
+        user.refresh_from_db()
+        self.assertEqual(user.balance, 1149)
+        record = models.IdempotencyKey.objects.get()
+        self.assertEqual(record.response, {"value": 1149})
+        self.assertGreater(record.created, timezone.now() - timedelta(seconds=60))
+
+    def test_idempotent_failure_not_stored(self):
+        self.client.force_authenticate(user=self.staff)
+        user = models.User.objects.create(username="user")
+        url = f"/user/{user.id}/update-balance"
+        headers = {"Idempotency-Key": "top-up-1"}
+        response = self.client.post(url, data={"value": 100}, format="json", headers=headers)
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertFalse(models.IdempotencyKey.objects.exists())
+        user.is_verified = True
+        user.save()
+        response = self.client.post(url, data={"value": 100}, format="json", headers=headers)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.json(), {"value": 100})
+
     def test_not_verified(self):
         self.client.force_authenticate(user=self.staff)
         user = models.User.objects.create(username="user")
@@ -340,3 +483,100 @@ class UserUpdateBalanceViewTests(APITestCase):
         url = "/user/1/update-balance"
         response = self.client.post(url, data={"value": 100}, format="json")
         self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+
+@skipUnless(connection.vendor == "postgresql", "Relies on PostgreSQL blocking insert on uncommitted unique key")
+class UserUpdateBalanceConcurrencyTests(TransactionTestCase):
+    def test_concurrent_duplicate_waits(self):
+        staff = models.User.objects.create(username="staff", is_staff=True)
+        user = models.User.objects.create(username="user", is_verified=True, balance=50)
+        url = f"/user/{user.id}/update-balance"
+        headers = {"Idempotency-Key": "top-up-1"}
+        first_started = threading.Event()
+        original_is_valid = serializers.UserUpdateBalanceSerializer.is_valid
+        calls = []
+
+        def slow_is_valid(ser, *args, **kwargs):
+            # Keep the first request in flight while the duplicate arrives
+            calls.append(ser)
+            first_started.set()
+            time.sleep(0.5)
+            return original_is_valid(ser, *args, **kwargs)
+
+        responses = {}
+
+        def post(name):
+            client = APIClient()
+            client.force_authenticate(user=staff)
+            try:
+                responses[name] = client.post(url, data={"value": 100}, format="json", headers=headers)
+            finally:
+                connection.close()
+
+        with patch.object(serializers.UserUpdateBalanceSerializer, "is_valid", slow_is_valid):
+            first = threading.Thread(target=post, args=["first"])
+            second = threading.Thread(target=post, args=["second"])
+            first.start()
+            first_started.wait(5)
+            second.start()
+            first.join()
+            second.join()
+
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(responses["first"].status_code, status.HTTP_200_OK)
+        self.assertEqual(responses["second"].status_code, status.HTTP_200_OK)
+        self.assertEqual(responses["first"].json(), {"value": 150})
+        self.assertEqual(responses["second"].json(), {"value": 150})
+        user.refresh_from_db()
+        self.assertEqual(user.balance, 150)
+
+
+class PurgeDeletedUsersCommandTests(APITestCase):
+    def test_purge(self):
+        kept = models.User.objects.create(username="kept")
+        for i in range(5):
+            models.User.objects.create(username=f"user{i}").soft_delete()
+        out = StringIO()
+        call_command("purge_deleted_users", batch_size=2, pause=0, stdout=out)
+        self.assertEqual(out.getvalue().strip(), "Purged 5 users")
+        self.assertEqual(list(models.User.all_objects.values_list("id", flat=True)), [kept.id])
+
+
+class PurgeIdempotencyKeysCommandTests(APITestCase):
+    @override_settings(IDEMPOTENCY_KEY_TTL=60)
+    def test_purge(self):
+        expired = models.IdempotencyKey.objects.create(scope="0:/user/", key="old", request_hash="")
+        models.IdempotencyKey.objects.filter(id=expired.id).update(created=expired.created - timedelta(seconds=61))
+        fresh = models.IdempotencyKey.objects.create(scope="0:/user/", key="new", request_hash="")
+        out = StringIO()
+        call_command("purge_idempotency_keys", pause=0, stdout=out)
+        self.assertEqual(out.getvalue().strip(), "Purged 1 idempotency keys")
+        self.assertEqual(list(models.IdempotencyKey.objects.values_list("id", flat=True)), [fresh.id])
+
+
+class FindUsernameCollisionsCommandTests(TransactionTestCase):
+    def test_no_collisions(self):
+        for i in range(5):
+            models.User.objects.create(username=f"User{i}")
+        out = StringIO()
+        call_command("find_username_collisions", batch_size=2, stdout=out)
+        self.assertEqual(out.getvalue().strip(), "Found 0 collisions")
+
+    def test_collisions(self):
+        # Collisions can only exist in database created before case-insensitive constraint
+        constraint = next(c for c in models.User._meta.constraints if c.name == "user_username_lower_unique")
+        with connection.schema_editor() as editor:
+            editor.remove_constraint(models.User, constraint)
+        try:
+            users = [models.User.objects.create(username=name) for name in ["bob", "Alice", "BOB", "x", "alice", "Bob"]]
+            out = StringIO()
+            call_command("find_username_collisions", batch_size=1, stdout=out)
+            self.assertEqual(out.getvalue().splitlines(), [
+                f"{users[1].id}:Alice, {users[4].id}:alice",
+                f"{users[0].id}:bob, {users[2].id}:BOB, {users[5].id}:Bob",
+                "Found 2 collisions",
+            ])
+        finally:
+            models.User.all_objects.all().delete()
+            with connection.schema_editor() as editor:
+                editor.add_constraint(models.User, constraint)
@@ -8,14 +8,15 @@ from rest_framework.mixins import CreateModelMixin, ListModelMixin, UpdateModelM
 from rest_framework.permissions import IsAdminUser
 from rest_framework.response import Response
 
-from fuser import serializers
+from fuser import filters, serializers
+from fuser.idempotency import idempotent
 from fuser.models import User
 from fuser.permissions import IsOwner
 
 
 class UserListView(CreateModelMixin, ListModelMixin, GenericAPIView):
     filter_backends = [DjangoFilterBackend]
-    filterset_fields = ['username', 'is_verified']
+    filterset_class = filters.UserFilter
     authentication_classes= [BasicAuthentication]
     queryset = User.objects.all()
 
@@ -29,6 +30,7 @@ class UserListView(CreateModelMixin, ListModelMixin, GenericAPIView):
             "OPTIONS": [],
         }[self.request.method]
 
+    @idempotent
     def post(self, request, *args, **kwargs):
         return self.create(request, *args, **kwargs)
 
@@ -36,22 +38,32 @@ class UserListView(CreateModelMixin, ListModelMixin, GenericAPIView):
         return self.list(request, *args, **kwargs)
 
 
+staff = IsAdminUser()
+staff_or_owner = (IsAdminUser | IsOwner)()
+user_detail_permissions = {
+    "GET": [staff],
+    "PUT": [staff_or_owner],
+    "PATCH": [staff_or_owner],
+    "DELETE": [staff],
+    "OPTIONS": [],
+}
+
+
 class UserDetailView(UpdateModelMixin, DestroyModelMixin, GenericAPIView):
     serializer_class = serializers.UserUpdateSerializer
     authentication_classes = [BasicAuthentication]
     queryset = User.objects.all()
 
     def get_permissions(self):
-        staff = IsAdminUser()
-        staff_or_owner = (IsAdminUser | IsOwner)()
-        res = {
-            "GET": [staff],
-            "PUT": [staff_or_owner],
-            "PATCH": [staff_or_owner],
-            "DELETE": [staff],
-            "OPTIONS": [],
-        }[self.request.method]
-        return res
+        return user_detail_permissions[self.request.method]
+
+    def get_object(self):
+        # Authenticated owner is already loaded, no need to fetch it again
+        user = self.request.user
+        if user.pk == self.kwargs["pk"] and user.deleted is None:
+            self.check_object_permissions(self.request, user)
+            return user
+        return super().get_object()
 
     def put(self, request, *args, **kwargs):
         return self.update(request, *args, **kwargs)
@@ -62,6 +74,9 @@ class UserDetailView(UpdateModelMixin, DestroyModelMixin, GenericAPIView):
     def delete(self, request, *args, **kwargs):
         return self.destroy(request, *args, **kwargs)
 
+    def perform_destroy(self, instance):
+        instance.soft_delete()
+
 
 class UserUpdateVerificationView(GenericAPIView):
     authentication_classes = [BasicAuthentication]
@@ -83,6 +98,7 @@ class UserUpdateBalanceView(GenericAPIView):
     permission_classes = [IsAdminUser]
     serializer_class = serializers.UserUpdateBalanceSerializer
 
+    @idempotent
     @transaction.atomic
     def post(self, request, *args, **kwargs):
         ser = serializers.UserUpdateBalanceSerializer(data=request.data)